@@ -13,27 +13,68 @@ Usage:
 
 import argparse
 import sys
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain
 
 # Import functions from the main script
 from fetch_hn_posts import (
     FEED_DATA_FILE,
     RSS_FILE,
     MIN_POINTS,
+    add_new_posts,
     fetch_hn_posts,
     load_feed_data,
+    open_api_connection,
     save_feed_data,
     prune_old_posts,
     generate_rss,
 )
 
+MAX_WORKERS = 8  # Maximum concurrent requests to the Algolia API
+SECONDS_PER_DAY = 86400
 
-def get_day_timestamps(days_ago):
+
+def get_today_timestamp():
+    """Get the Unix timestamp for the start of today (UTC)."""
+    now_ts = int(time.time())
+    return now_ts - now_ts % SECONDS_PER_DAY
+
+
+def get_day_timestamps(days_ago, today_ts=None):
     """Get Unix timestamps for a specific day N days ago (UTC)."""
-    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    day_start = today - timedelta(days=days_ago)
-    day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
-    return int(day_start.timestamp()), int(day_end.timestamp())
+    if today_ts is None:
+        today_ts = get_today_timestamp()
+    day_start = today_ts - days_ago * SECONDS_PER_DAY
+    return day_start, day_start + SECONDS_PER_DAY - 1
+
+
+def fetch_posts_by_day(start_days, end_days, today_ts):
+    """Fetch the top posts for each day in the range, one query per day, concurrently.
+
+    Returns a dict mapping days ago to that day's posts (points descending).
+    """
+    days_range = range(start_days, end_days + 1)
+
+    # Each worker thread keeps one connection open and reuses it for later days
+    thread_state = threading.local()
+    connections = []
+
+    def fetch_day(days_ago):
+        conn = getattr(thread_state, "conn", None)
+        if conn is None:
+            conn = thread_state.conn = open_api_connection()
+            connections.append(conn)
+        return fetch_hn_posts(*get_day_timestamps(days_ago, today_ts), conn=conn)
+
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return dict(zip(days_range, executor.map(fetch_day, days_range)))
+    finally:
+        for conn in connections:
+            conn.close()
 
 
 def main():
@@ -74,37 +115,32 @@ def main():
 
     # Load existing feed data or start fresh if replacing
     if args.replace:
-        feed_data = {"posts": [], "last_updated": None}
-        existing_ids = set()
+        feed_data = {"posts": {}, "last_updated": None}
         print("Starting with empty feed (replace mode)")
     else:
         feed_data = load_feed_data(FEED_DATA_FILE)
-        existing_ids = {p["id"] for p in feed_data["posts"]}
         print(f"Existing feed has {len(feed_data['posts'])} posts")
 
-    total_added = 0
+    today_ts = get_today_timestamp()
+    posts_by_day = fetch_posts_by_day(start_days, end_days, today_ts)
 
-    # Fetch posts for each day in the range
-    for days_ago in range(start_days, end_days + 1):
-        start_ts, end_ts = get_day_timestamps(days_ago)
-        target_date = datetime.fromtimestamp(start_ts, tz=timezone.utc)
-        print(f"\nFetching posts from: {target_date.strftime('%Y-%m-%d')} ({days_ago} days ago)")
+    # Add new posts (avoid duplicates) in one pass, so the feed is merged only once
+    added_ids = {
+        post.id
+        for post in add_new_posts(feed_data["posts"], chain.from_iterable(posts_by_day.values()))
+    }
+    total_added = len(added_ids)
 
-        # Fetch posts for this day
-        new_posts = fetch_hn_posts(start_ts, end_ts)
+    for days_ago, new_posts in posts_by_day.items():
+        target_date = datetime.fromtimestamp(get_day_timestamps(days_ago, today_ts)[0], tz=timezone.utc)
+        print(f"\nPosts from: {target_date.strftime('%Y-%m-%d')} ({days_ago} days ago)")
         print(f"Found {len(new_posts)} posts with >= {MIN_POINTS} points")
 
-        # Add new posts (avoid duplicates)
-        added = 0
-        for post in new_posts:
-            if post["id"] not in existing_ids:
-                feed_data["posts"].append(post)
-                existing_ids.add(post["id"])
-                added += 1
-                print(f"  + [{post['points']} pts] {post['title'][:50]}...")
+        added = [post for post in new_posts if post.id in added_ids]
+        if added:
+            sys.stdout.write("".join(f"  + [{post.points} pts] {post.title[:50]}...\n" for post in added))
 
-        print(f"Added {added} new posts from {target_date.strftime('%Y-%m-%d')}")
-        total_added += added
+        print(f"Added {len(added)} new posts from {target_date.strftime('%Y-%m-%d')}")
 
     # Prune old posts (only relevant in append mode, but harmless in replace mode)
     original_count = len(feed_data["posts"])
@@ -121,7 +157,7 @@ def main():
     print(f"\nSaved feed data to {FEED_DATA_FILE}")
 
     # Generate RSS
-    generate_rss(feed_data["posts"], RSS_FILE)
+    generate_rss(reversed(feed_data["posts"].values()), RSS_FILE)
     print(f"Generated RSS feed at {RSS_FILE}")
 
     print("\n" + "=" * 60)
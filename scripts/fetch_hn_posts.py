@@ -4,16 +4,43 @@ Fetch yesterday's top HN posts from Algolia API and update the RSS feed.
 Maintains a rolling 90-day window of posts.
 """
 
-import json
-import os
+import gzip
+import heapq
 import sys
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
+import http.client
+import urllib.error
 import urllib.request
 import urllib.parse
 
+# Use the fastest JSON library available, falling back to the standard library.
+# Output is compact UTF-8 with a trailing newline, byte-identical across backends.
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(data):
+        return orjson.dumps(data) + b"\n"
+except ImportError:
+    try:
+        import ujson
+
+        json_loads = ujson.loads
+
+        def json_dumps(data):
+            return (ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False) + "\n").encode("utf-8")
+    except ImportError:
+        import json
+
+        json_loads = json.loads
+
+        def json_dumps(data):
+            return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
 # Configuration
 ALGOLIA_API_URL = "https://hn.algolia.com/api/v1/search"
 MIN_POINTS = 100  # Minimum points for a post to be included
@@ -22,6 +49,23 @@ RETENTION_DAYS = 90  # Keep posts for 90 days
 FEED_DATA_FILE = "docs/feed_data.json"
 RSS_FILE = "docs/feed.xml"
 
+# Escapes text for XML/HTML element content and double-quoted attributes
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+@dataclass(slots=True)
+class Post:
+    """A single HN story as stored in the feed."""
+
+    id: str
+    title: str
+    url: str
+    points: int
+    author: str
+    created_at: int
+    num_comments: int
+    hn_url: str
+
 
 def get_yesterday_timestamps():
     """Get Unix timestamps for yesterday (UTC)."""
@@ -31,8 +75,33 @@ def get_yesterday_timestamps():
     return int(yesterday_start.timestamp()), int(yesterday_end.timestamp())
 
 
-def fetch_hn_posts(start_ts, end_ts):
-    """Fetch top posts from Algolia HN API for the given time range."""
+def post_from_hit(hit):
+    """Build a Post from an Algolia search hit."""
+    post_id = hit["objectID"]
+    hn_url = f"https://news.ycombinator.com/item?id={post_id}"
+    return Post(
+        id=post_id,
+        title=hit.get("title", "Untitled"),
+        url=hit.get("url") or hn_url,
+        points=hit.get("points", 0),
+        author=hit.get("author", "unknown"),
+        created_at=hit.get("created_at_i", 0),
+        num_comments=hit.get("num_comments", 0),
+        hn_url=hn_url,
+    )
+
+
+def open_api_connection():
+    """Open a keep-alive HTTPS connection to the Algolia API host."""
+    host = urllib.parse.urlsplit(ALGOLIA_API_URL).netloc
+    return http.client.HTTPSConnection(host, timeout=30)
+
+
+def fetch_hn_posts(start_ts, end_ts, conn=None):
+    """Fetch top posts from Algolia HN API for the given time range.
+
+    Pass an open connection from open_api_connection() to reuse it across calls.
+    """
     params = {
         "tags": "story",
         "numericFilters": f"created_at_i>={start_ts},created_at_i<={end_ts},points>={MIN_POINTS}",
@@ -42,105 +111,142 @@ def fetch_hn_posts(start_ts, end_ts):
 
     print(f"Fetching posts from: {url}")
 
-    req = urllib.request.Request(url, headers={"User-Agent": "HN-Daily-Reader/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as response:
-        data = json.loads(response.read().decode("utf-8"))
-
-    posts = []
-    for hit in data.get("hits", []):
-        post = {
-            "id": hit["objectID"],
-            "title": hit.get("title", "Untitled"),
-            "url": hit.get("url") or f"https://news.ycombinator.com/item?id={hit['objectID']}",
-            "points": hit.get("points", 0),
-            "author": hit.get("author", "unknown"),
-            "created_at": hit.get("created_at_i", 0),
-            "num_comments": hit.get("num_comments", 0),
-            "hn_url": f"https://news.ycombinator.com/item?id={hit['objectID']}",
-        }
-        posts.append(post)
+    headers = {"User-Agent": "HN-Daily-Reader/1.0"}
+    if conn is None:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=30) as response:
+            data = json_loads(response.read())
+    else:
+        parts = urllib.parse.urlsplit(url)
+        conn.request("GET", f"{parts.path}?{parts.query}", headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        data = json_loads(body)
+
+    posts = [post_from_hit(hit) for hit in data.get("hits", [])]
 
     # Sort by points descending
-    posts.sort(key=lambda x: x["points"], reverse=True)
+    posts.sort(key=attrgetter("points"), reverse=True)
     return posts
 
 
 def load_feed_data(filepath):
-    """Load existing feed data from JSON file."""
-    if os.path.exists(filepath):
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"posts": [], "last_updated": None}
+    """Load existing feed data from JSON file.
+
+    Posts are returned as a dict keyed by post id, ordered by created_at (oldest
+    first). Files written in the older list-of-posts format are migrated on
+    load. Paths ending in .gz are read as gzip-compressed JSON.
+    """
+    path = Path(filepath)
+    if path.exists():
+        raw = path.read_bytes()
+        if path.suffix == ".gz":
+            raw = gzip.decompress(raw)
+        data = json_loads(raw)
+        records = data["posts"]
+        if isinstance(records, list):
+            records = {p["id"]: p for p in sorted(records, key=itemgetter("created_at"))}
+        data["posts"] = {pid: Post(**p) for pid, p in records.items()}
+        return data
+    return {"posts": {}, "last_updated": None}
 
 
 def save_feed_data(filepath, data):
-    """Save feed data to JSON file."""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    """Save feed data to JSON file.
+
+    Writes to a temporary file first and swaps it into place, so an interrupted
+    run never leaves a truncated feed_data.json behind. Paths ending in .gz are
+    written gzip-compressed (at the fastest compression level).
+    """
+    path = Path(filepath)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    raw = json_dumps({**data, "posts": {pid: asdict(p) for pid, p in data["posts"].items()}})
+    if path.suffix == ".gz":
+        raw = gzip.compress(raw, compresslevel=1)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(raw)
+    tmp_path.replace(path)
+
+
+def add_new_posts(posts, new_posts):
+    """Add posts whose ids are not already in the posts dict and return the ones added.
+
+    The posts dict is kept ordered by created_at (oldest first).
+    """
+    by_id = {p.id: p for p in new_posts}
+    fresh_ids = by_id.keys() - posts.keys()
+    if not fresh_ids:
+        return []
+
+    # Keep the fetch order (points descending) for the posts that survive
+    added = [p for pid, p in by_id.items() if pid in fresh_ids]
+    added_by_age = sorted(added, key=attrgetter("created_at"))
+
+    newest = next(reversed(posts.values()), None)
+    if newest is None or added_by_age[0].created_at >= newest.created_at:
+        # Common case (daily run): everything new is newer than the feed
+        posts.update((p.id, p) for p in added_by_age)
+    else:
+        # Backfill: merge the two ordered runs
+        merged = list(heapq.merge(posts.values(), added_by_age, key=attrgetter("created_at")))
+        posts.clear()
+        posts.update((p.id, p) for p in merged)
+    return added
 
 
 def prune_old_posts(posts, days=RETENTION_DAYS):
     """Remove posts older than the retention period."""
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
     cutoff_ts = int(cutoff.timestamp())
-    return [p for p in posts if p["created_at"] >= cutoff_ts]
+    # Common case: nothing has aged out (posts are oldest first), so skip the rebuild
+    if not posts or next(iter(posts.values())).created_at >= cutoff_ts:
+        return posts
+    return {pid: p for pid, p in posts.items() if p.created_at >= cutoff_ts}
 
 
 def generate_rss(posts, output_file):
-    """Generate RSS 2.0 feed from posts."""
-    rss = ET.Element("rss", version="2.0")
-    rss.set("xmlns:atom", "http://www.w3.org/2005/Atom")
-
-    channel = ET.SubElement(rss, "channel")
-
-    # Channel metadata
-    ET.SubElement(channel, "title").text = "HN Daily Top Posts"
-    ET.SubElement(channel, "link").text = "https://news.ycombinator.com"
-    ET.SubElement(channel, "description").text = "Daily curated top posts from Hacker News (auto-generated, last 90 days)"
-    ET.SubElement(channel, "language").text = "en-us"
-    ET.SubElement(channel, "lastBuildDate").text = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
-
-    # Add atom:link for self-reference (RSS best practice)
-    atom_link = ET.SubElement(channel, "{http://www.w3.org/2005/Atom}link")
-    atom_link.set("href", "https://YOUR_USERNAME.github.io/hn-daily-reader/feed.xml")
-    atom_link.set("rel", "self")
-    atom_link.set("type", "application/rss+xml")
-
-    # Sort posts by created_at descending (newest first)
-    sorted_posts = sorted(posts, key=lambda x: x["created_at"], reverse=True)
-
-    for post in sorted_posts:
-        item = ET.SubElement(channel, "item")
-        ET.SubElement(item, "title").text = f"[{post['points']} pts] {post['title']}"
-        ET.SubElement(item, "link").text = post["url"]
-
-        # Description with metadata
-        description = f"""
-<p><strong>{post['points']} points</strong> by {post['author']} | <strong>{post['num_comments']} comments</strong></p>
-<p><a href="{post['hn_url']}">View on Hacker News</a></p>
-        """.strip()
-        ET.SubElement(item, "description").text = description
-
-        # Use HN URL as guid for uniqueness
-        guid = ET.SubElement(item, "guid")
-        guid.text = post["hn_url"]
-        guid.set("isPermaLink", "true")
-
-        # Publication date
-        pub_date = datetime.fromtimestamp(post["created_at"], tz=timezone.utc)
-        ET.SubElement(item, "pubDate").text = pub_date.strftime("%a, %d %b %Y %H:%M:%S +0000")
-
-    # Pretty print XML
-    xml_str = ET.tostring(rss, encoding="unicode")
-    pretty_xml = minidom.parseString(xml_str).toprettyxml(indent="  ")
-    # Remove extra blank lines and fix declaration
-    lines = [line for line in pretty_xml.split("\n") if line.strip()]
-    lines[0] = '<?xml version="1.0" encoding="UTF-8"?>'
-
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+    """Generate RSS 2.0 feed from posts (ordered newest first), streaming items straight to disk."""
+    path = Path(output_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    last_build = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+    with open(path, "w", encoding="utf-8") as f:
+        # Channel metadata, plus atom:link for self-reference (RSS best practice)
+        f.write(f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+  <channel>
+    <title>HN Daily Top Posts</title>
+    <link>https://news.ycombinator.com</link>
+    <description>Daily curated top posts from Hacker News (auto-generated, last 90 days)</description>
+    <language>en-us</language>
+    <lastBuildDate>{last_build}</lastBuildDate>
+    <atom:link href="https://YOUR_USERNAME.github.io/hn-daily-reader/feed.xml" rel="self" type="application/rss+xml" />
+""")
+
+        for post in posts:
+            hn_url = post.hn_url.translate(_XML_ESCAPE)
+
+            # Description with metadata (HTML, escaped again as XML text below)
+            description = f"""
+<p><strong>{post.points} points</strong> by {post.author.translate(_XML_ESCAPE)} | <strong>{post.num_comments} comments</strong></p>
+<p><a href="{hn_url}">View on Hacker News</a></p>
+            """.strip()
+            pub_date = datetime.fromtimestamp(post.created_at, tz=timezone.utc)
+
+            # Use HN URL as guid for uniqueness
+            f.write(f"""    <item>
+      <title>[{post.points} pts] {post.title.translate(_XML_ESCAPE)}</title>
+      <link>{post.url.translate(_XML_ESCAPE)}</link>
+      <description>{description.translate(_XML_ESCAPE)}</description>
+      <guid isPermaLink="true">{hn_url}</guid>
+      <pubDate>{pub_date.strftime("%a, %d %b %Y %H:%M:%S +0000")}</pubDate>
+    </item>
+""")
+
+        f.write("  </channel>\n</rss>")
 
 
 def main():
@@ -159,18 +265,14 @@ def main():
 
     # Load existing feed data
     feed_data = load_feed_data(FEED_DATA_FILE)
-    existing_ids = {p["id"] for p in feed_data["posts"]}
     print(f"Existing feed has {len(feed_data['posts'])} posts")
 
     # Add new posts (avoid duplicates)
-    added = 0
-    for post in new_posts:
-        if post["id"] not in existing_ids:
-            feed_data["posts"].append(post)
-            added += 1
-            print(f"  + [{post['points']} pts] {post['title'][:50]}...")
+    added = add_new_posts(feed_data["posts"], new_posts)
+    if added:
+        sys.stdout.write("".join(f"  + [{post.points} pts] {post.title[:50]}...\n" for post in added))
 
-    print(f"Added {added} new posts")
+    print(f"Added {len(added)} new posts")
 
     # Prune old posts
     original_count = len(feed_data["posts"])
@@ -187,7 +289,7 @@ def main():
     print(f"Saved feed data to {FEED_DATA_FILE}")
 
     # Generate RSS
-    generate_rss(feed_data["posts"], RSS_FILE)
+    generate_rss(reversed(feed_data["posts"].values()), RSS_FILE)
     print(f"Generated RSS feed at {RSS_FILE}")
 
     print("=" * 60)